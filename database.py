@@ -5,11 +5,12 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import List, Tuple, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -22,11 +23,11 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    _client = AsyncIOMotorClient(database_url, maxPoolSize=50, minPoolSize=10)
     db = _client[database_name]
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -40,16 +41,90 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
-    """Get documents from collection"""
+async def create_documents(collection_name: str, data_list: List[Union[BaseModel, dict]], ordered: bool = False):
+    """Insert several documents with timestamps in a single round-trip"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    docs = []
+    for data in data_list:
+        data_dict = data.model_dump() if isinstance(data, BaseModel) else data.copy()
+        data_dict['created_at'] = now
+        data_dict['updated_at'] = now
+        docs.append(data_dict)
+
+    result = await db[collection_name].insert_many(docs, ordered=ordered)
+    return [str(inserted_id) for inserted_id in result.inserted_ids]
+
+def _upsert_update(data: Union[BaseModel, dict], now: datetime) -> dict:
+    """Update document that sets data and keeps created_at from the first write"""
+    data_dict = data.model_dump() if isinstance(data, BaseModel) else data.copy()
+    data_dict['updated_at'] = now
+    return {"$set": data_dict, "$setOnInsert": {"created_at": now}}
+
+async def upsert_documents(collection_name: str, items: List[Tuple[dict, Union[BaseModel, dict]]], ordered: bool = False):
+    """Upsert several (filter_dict, data) pairs in a single bulk write"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    now = datetime.now(timezone.utc)
+    requests = [UpdateOne(filter_dict, _upsert_update(data, now), upsert=True) for filter_dict, data in items]
+    result = await db[collection_name].bulk_write(requests, ordered=ordered)
+    return result.upserted_count
+
+def _find_cursor(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None,
+                 sort: list = None, id_as_string: bool = False, max_time_ms: int = None):
+    """Build the cursor shared by get_documents and stream_documents"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
     
-    cursor = db[collection_name].find(filter_dict or {})
+    if id_as_string:
+        pipeline = [{"$match": filter_dict or {}}]
+        if sort:
+            pipeline.append({"$sort": dict(sort)})
+        if limit:
+            pipeline.append({"$limit": limit})
+        if projection:
+            pipeline.append({"$project": projection})
+        pipeline.append({"$addFields": {"_id": {"$toString": "$_id"}}})
+        options = {"maxTimeMS": max_time_ms} if max_time_ms else {}
+        return db[collection_name].aggregate(pipeline, **options)
+
+    cursor = db[collection_name].find(filter_dict or {}, projection)
+    if sort:
+        cursor = cursor.sort(sort)
     if limit:
         cursor = cursor.limit(limit)
-    
-    return list(cursor)
+    if max_time_ms:
+        cursor = cursor.max_time_ms(max_time_ms)
+    return cursor
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None,
+                        sort: list = None, id_as_string: bool = False, max_time_ms: int = None):
+    """Get documents from collection
+
+    With id_as_string the query runs as an aggregation that converts _id to a string on the
+    server, so results can be returned without a per-document fix-up in Python.
+
+    max_time_ms makes the server abort the query once it has run for that long.
+    """
+    cursor = _find_cursor(collection_name, filter_dict, limit, projection, sort, id_as_string, max_time_ms)
+    return await cursor.to_list(length=None)
+
+def stream_documents(collection_name: str, filter_dict: dict = None, limit: int = None, projection: dict = None,
+                     sort: list = None, id_as_string: bool = False, max_time_ms: int = None):
+    """Like get_documents, but yield documents as the server returns them instead of building a list
+
+    The cursor is created eagerly so an unavailable database is reported before streaming starts.
+    """
+    cursor = _find_cursor(collection_name, filter_dict, limit, projection, sort, id_as_string, max_time_ms)
+
+    async def documents():
+        async for doc in cursor:
+            yield doc
+
+    return documents()
@@ -0,0 +1,51 @@
+"""
+Favorites Deduplication
+
+One-off migration for databases written before favorites were upserted, when every
+POST /favorites inserted a new document. Keeps the newest favorite per
+(client_id, kind, ref) and builds the unique index the favorite writer relies on.
+
+Run without arguments to report what would be removed; pass --apply to remove it:
+
+    python dedupe_favorites.py
+    python dedupe_favorites.py --apply
+"""
+
+import argparse
+import asyncio
+
+from database import db
+from main import FAVORITE_KEY, FAVORITE_KEY_INDEX
+
+async def find_duplicates():
+    """_ids of every favorite that has a newer one with the same key"""
+    groups = db.favorite.aggregate([
+        {"$sort": {"updated_at": -1, "_id": -1}},
+        {"$group": {"_id": {field: "$" + field for field in FAVORITE_KEY}, "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True)
+    stale = []
+    async for group in groups:
+        stale.extend(group["ids"][1:])
+    return stale
+
+async def main(apply: bool):
+    if db is None:
+        raise SystemExit("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    stale = await find_duplicates()
+    print(f"Found {len(stale)} duplicate favorites")
+    if not apply:
+        print("Dry run; pass --apply to remove them and build the unique index")
+        return
+
+    if stale:
+        result = await db.favorite.delete_many({"_id": {"$in": stale}})
+        print(f"Removed {result.deleted_count} duplicate favorites")
+    await db.favorite.create_index([(field, 1) for field in FAVORITE_KEY], name=FAVORITE_KEY_INDEX, unique=True)
+    print(f"Built {FAVORITE_KEY_INDEX}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Remove duplicate favorites and build their unique index")
+    parser.add_argument("--apply", action="store_true", help="delete the duplicates instead of only reporting them")
+    asyncio.run(main(parser.parse_args().apply))
@@ -1,13 +1,35 @@
+import asyncio
+import contextlib
+import hashlib
+import inspect
+import logging
 import os
-from fastapi import FastAPI, HTTPException
+import re
+from functools import wraps
+import orjson
+from cachetools import TTLCache
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
+from pymongo.errors import ConnectionFailure, DuplicateKeyError, ExecutionTimeout, OperationFailure
 from typing import List, Optional
 
-from database import db, create_document, get_documents
+from database import db, create_documents, get_documents, stream_documents, upsert_documents
 from schemas import Chord, Progression, Lesson, Favorite
 
-app = FastAPI(title="Master Jazz Pianist API")
+logger = logging.getLogger(__name__)
+
+def encode_json(content) -> bytes:
+    """Serialize with orjson, falling back to str() for BSON types such as ObjectId"""
+    return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+class MongoJSONResponse(ORJSONResponse):
+    """ORJSONResponse that can also encode raw MongoDB documents"""
+    def render(self, content) -> bytes:
+        return encode_json(content)
+
+app = FastAPI(title="Master Jazz Pianist API", default_response_class=MongoJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -17,12 +39,197 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Lowercased copies of chord name/symbol; case-insensitive prefix searches run against these
+# with plain anchored regexes, which (unlike $options "i" or collations) can bound an index scan
+CHORD_SEARCH_KEYS = {"name_lower": "name", "symbol_lower": "symbol"}
+
+def with_search_keys(chord: dict) -> dict:
+    return {**chord, **{key: chord[field].lower() for key, field in CHORD_SEARCH_KEYS.items()}}
+
+# Search terms containing any of these skip text search: regex metacharacters are treated as
+# patterns, and - and " would be read as $text negation and phrase operators
+NON_TEXT_SEARCH_CHARACTERS = re.compile(r"[.^$*+?()\[\]{}|\\\-\"]")
+
+# Limits on /chords searches so a single request can't tie up the database
+MAX_SEARCH_LENGTH = 64
+SEARCH_MAX_TIME_MS = 200
+SEARCH_TIMEOUT_DETAIL = "Search took too long; try a more specific query"
+
+# List endpoints return only the schema fields, leaving out bookkeeping such as timestamps
+CHORD_FIELDS = {field: 1 for field in Chord.model_fields}
+PROGRESSION_FIELDS = {field: 1 for field in Progression.model_fields}
+LESSON_FIELDS = {field: 1 for field in Lesson.model_fields}
+FAVORITE_FIELDS = {"_id": 0, **{field: 1 for field in Favorite.model_fields}}
+
+# Serialized responses of the reference-data list endpoints and their ETags,
+# keyed on (endpoint, query args)
+_response_cache = TTLCache(maxsize=512, ttl=60)
+
+# Lets browsers and CDNs reuse reference-data responses for as long as the in-process cache does
+CACHE_CONTROL = "public, max-age=60"
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def cached_endpoint(name: str):
+    """Cache an endpoint's JSON-encoded result and return it as a raw Response with an ETag
+
+    Requests whose If-None-Match matches the cached ETag get a bodiless 304 instead.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(request: Request, **kwargs):
+            key = (name, tuple(sorted(kwargs.items())))
+            entry = _response_cache.get(key)
+            if entry is None:
+                body = encode_json(await func(**kwargs))
+                etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+                entry = _response_cache[key] = (body, etag)
+            body, etag = entry
+            headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+            if_none_match = request.headers.get("if-none-match")
+            if if_none_match and etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers=headers)
+            return Response(content=body, media_type="application/json", headers=headers)
+
+        # Expose the endpoint's own parameters plus the Request so FastAPI injects both
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(parameters=[
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            *(param.replace(kind=inspect.Parameter.KEYWORD_ONLY) for param in signature.parameters.values()),
+        ])
+        return wrapper
+    return decorator
+
+def clear_response_cache():
+    _response_cache.clear()
+
+# A favorite is identified by who saved it and what it points at; a chord and a progression
+# may share a ref, so kind is part of the key
+FAVORITE_KEY = ("client_id", "kind", "ref")
+FAVORITE_KEY_INDEX = "fav_client_kind_ref"
+
+def favorite_filter(fav: dict) -> dict:
+    return {field: fav[field] for field in FAVORITE_KEY}
+
+# Upper bound on the startup ping, so an unreachable database doesn't hold up boot
+WARMUP_TIMEOUT_SECONDS = 5
+
+@app.on_event("startup")
+async def warm_connection_pool():
+    # Open the pool up front so the first request doesn't pay for connecting; a database
+    # outage is logged and left for /test to report rather than failing startup
+    app.state.database_reachable = False
+    if db is None:
+        return
+    try:
+        await asyncio.wait_for(db.command("ping"), WARMUP_TIMEOUT_SECONDS)
+        app.state.database_reachable = True
+    except Exception:
+        logger.exception("Could not reach the database while warming the connection pool")
+
+# How often ensure_indexes is retried while the database can't be reached
+INDEX_RETRY_SECONDS = 30
+
+async def ensure_indexes() -> bool:
+    """Backfill search keys and build indexes; False if the database couldn't be reached"""
+    try:
+        # Backfill search keys on chords written before they existed; a no-op once every chord has them
+        await db.chord.update_many(
+            {"$or": [{key: {"$exists": False}} for key in CHORD_SEARCH_KEYS]},
+            [{"$set": {key: {"$toLower": "$" + field} for key, field in CHORD_SEARCH_KEYS.items()}}],
+        )
+        for key in CHORD_SEARCH_KEYS:
+            await db.chord.create_index([(key, 1)])
+        await db.chord.create_index(
+            [("name", "text"), ("symbol", "text")], name="chord_text_idx", weights={"symbol": 10, "name": 5}
+        )
+        await db.favorite.create_index([("client_id", 1), ("kind", 1)], name="fav_client_kind")
+    except ConnectionFailure:
+        logger.warning("Database unreachable; retrying index builds in %ds", INDEX_RETRY_SECONDS)
+        return False
+    except Exception:
+        logger.exception("Failed to ensure database indexes")
+    try:
+        # One favorite per key; the favorite writer upserts against this index
+        await db.favorite.create_index([(field, 1) for field in FAVORITE_KEY], name=FAVORITE_KEY_INDEX, unique=True)
+    except ConnectionFailure:
+        logger.warning("Database unreachable; retrying index builds in %ds", INDEX_RETRY_SECONDS)
+        return False
+    except DuplicateKeyError:
+        # Left to an operator rather than deleting user data at boot
+        logger.warning(
+            "Favorites contain duplicates, so %s was not built; run `python dedupe_favorites.py` to review and remove them",
+            FAVORITE_KEY_INDEX,
+        )
+    except Exception:
+        logger.exception("Failed to build the unique favorites index")
+    return True
+
+async def ensure_indexes_until_done():
+    while not await ensure_indexes():
+        await asyncio.sleep(INDEX_RETRY_SECONDS)
+
+@app.on_event("startup")
+async def start_index_builder():
+    # Runs in the background so boot never waits on the database; search falls back to the
+    # prefix query until the text index exists
+    if db is None:
+        return
+    app.state.index_builder = asyncio.create_task(ensure_indexes_until_done())
+
+@app.on_event("shutdown")
+async def stop_index_builder():
+    builder = getattr(app.state, "index_builder", None)
+    if builder is None:
+        return
+    builder.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await builder
+
+# How often the collection-name snapshot served by /test is refreshed
+COLLECTIONS_REFRESH_SECONDS = 60
+
+async def refresh_collections():
+    try:
+        app.state.collections = (await db.list_collection_names())[:10]
+        app.state.collections_error = None
+    except Exception as e:
+        app.state.collections_error = str(e)
+
+async def refresh_collections_forever():
+    while True:
+        await asyncio.sleep(COLLECTIONS_REFRESH_SECONDS)
+        await refresh_collections()
+
+@app.on_event("startup")
+async def start_collections_refresher():
+    if db is None:
+        return
+    if app.state.database_reachable:
+        await refresh_collections()
+    else:
+        # Listing would wait out the full server selection timeout; the loop picks it up later
+        app.state.collections_error = "Database unreachable at startup"
+    app.state.collections_refresher = asyncio.create_task(refresh_collections_forever())
+
+@app.on_event("shutdown")
+async def stop_collections_refresher():
+    refresher = getattr(app.state, "collections_refresher", None)
+    if refresher is None:
+        return
+    refresher.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await refresher
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Master Jazz Pianist API is running"}
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -38,12 +245,13 @@ def test_database():
             response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
             response["database_name"] = db.name if hasattr(db, 'name') else "✅ Connected"
             response["connection_status"] = "Connected"
-            try:
-                collections = db.list_collection_names()
-                response["collections"] = collections[:10]
+            # Served from the snapshot kept by refresh_collections, so this makes no DB calls
+            error = getattr(app.state, "collections_error", "Collection list not loaded yet")
+            if error is None:
+                response["collections"] = app.state.collections
                 response["database"] = "✅ Connected & Working"
-            except Exception as e:
-                response["database"] = f"⚠️  Connected but Error: {str(e)[:50]}"
+            else:
+                response["database"] = f"⚠️  Connected but Error: {error[:50]}"
         else:
             response["database"] = "⚠️  Available but not initialized"
     except Exception as e:
@@ -51,35 +259,30 @@ def test_database():
 
     return response
 
-# Seed minimal content if empty
-@app.post("/seed")
-def seed():
-    # Seed a few basic chords and a ii-V-I progression if collection empty
-    try:
-        existing = get_documents("chord", {}, limit=1)
-        if not existing:
-            create_document("chord", Chord(
-                name="C Major 7", symbol="Cmaj7", root="C", quality="major7", notes=["C","E","G","B"],
-                extensions=["9","13"], voicings=[["C","E","B","D"],["E","B","D","G"]], tags=["rootless","shell"]
-            ))
-            create_document("chord", Chord(
-                name="G7", symbol="G7", root="G", quality="dominant7", notes=["G","B","D","F"],
-                extensions=["9","13"], voicings=[["F","B","E","A"],["B","E","A","D"]], tags=["altered","rootless"]
-            ))
-            create_document("chord", Chord(
-                name="D Minor 7", symbol="Dm7", root="D", quality="minor7", notes=["D","F","A","C"],
-                extensions=["9","11"], voicings=[["C","F","A","E"],["F","A","C","E"]], tags=["shell"]
-            ))
-        existing_prog = get_documents("progression", {}, limit=1)
-        if not existing_prog:
-            create_document("progression", Progression(
-                name="ii-V-I in C", key="C", roman_numerals=["ii","V","I"], chords=["Dm7","G7","Cmaj7"], style="bebop"
-            ))
-        existing_lesson = get_documents("lesson", {}, limit=1)
-        if not existing_lesson:
-            create_document("lesson", Lesson(
-                title="Rootless ii–V–I Voicings", level="intermediate",
-                content="""
+# Seed content, validated once at import; create_documents copies these before inserting
+_SEED_CHORDS = [with_search_keys(chord) for chord in [
+    Chord(
+        name="C Major 7", symbol="Cmaj7", root="C", quality="major7", notes=["C","E","G","B"],
+        extensions=["9","13"], voicings=[["C","E","B","D"],["E","B","D","G"]], tags=["rootless","shell"]
+    ).model_dump(),
+    Chord(
+        name="G7", symbol="G7", root="G", quality="dominant7", notes=["G","B","D","F"],
+        extensions=["9","13"], voicings=[["F","B","E","A"],["B","E","A","D"]], tags=["altered","rootless"]
+    ).model_dump(),
+    Chord(
+        name="D Minor 7", symbol="Dm7", root="D", quality="minor7", notes=["D","F","A","C"],
+        extensions=["9","11"], voicings=[["C","F","A","E"],["F","A","C","E"]], tags=["shell"]
+    ).model_dump(),
+]]
+_SEED_PROGRESSIONS = [
+    Progression(
+        name="ii-V-I in C", key="C", roman_numerals=["ii","V","I"], chords=["Dm7","G7","Cmaj7"], style="bebop"
+    ).model_dump(),
+]
+_SEED_LESSONS = [
+    Lesson(
+        title="Rootless ii–V–I Voicings", level="intermediate",
+        content="""
 ### Goal
 Play smooth rootless voicings for a ii–V–I in C.
 
@@ -88,44 +291,172 @@ Play smooth rootless voicings for a ii–V–I in C.
 - Right hand: play Dm9 (C–E–F–A), G13 (F–A–B–E), Cmaj9 (E–A–B–D)
 - Practice in all 12 keys using the circle of fifths
 """,
-                tags=["voicings","ii-v-i","practice"]
-            ))
+        tags=["voicings","ii-v-i","practice"]
+    ).model_dump(),
+]
+
+# Seed minimal content if empty
+@app.post("/seed")
+async def seed():
+    # Seed a few basic chords and a ii-V-I progression if collection empty
+    try:
+        if db is None:
+            raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+        if await db.chord.estimated_document_count() == 0:
+            await create_documents("chord", _SEED_CHORDS)
+        if await db.progression.estimated_document_count() == 0:
+            await create_documents("progression", _SEED_PROGRESSIONS)
+        if await db.lesson.estimated_document_count() == 0:
+            await create_documents("lesson", _SEED_LESSONS)
+        clear_response_cache()
+        await refresh_collections()
         return {"status": "ok"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def chord_queries(q: Optional[str], contains: bool) -> List[dict]:
+    """get_documents arguments for a /chords search, in the order to try them
+
+    $text only matches whole stemmed words (and ignores stop words such as "A"), so a word
+    search is followed by the prefix search for partial input like "Dm" or "Cmaj".
+    """
+    if q and len(q) > MAX_SEARCH_LENGTH:
+        raise HTTPException(status_code=400, detail=f"Search query must be at most {MAX_SEARCH_LENGTH} characters")
+    queries = []
+    if q and not contains and not NON_TEXT_SEARCH_CHARACTERS.search(q):
+        # Word search through the text index, best matches first
+        queries.append({
+            "filter_dict": {"$text": {"$search": q}},
+            "projection": CHORD_FIELDS,
+            "sort": [("score", {"$meta": "textScore"})],
+            "id_as_string": True,
+            "max_time_ms": SEARCH_MAX_TIME_MS,
+        })
+    filter_dict = {}
+    if q:
+        # Case-insensitive prefix match on the lowercased search keys, served by their indexes;
+        # contains=true falls back to an unanchored substring match, which has to scan
+        pattern = re.escape(q.lower()) if contains else "^" + re.escape(q.lower())
+        filter_dict = {"$or": [{key: {"$regex": pattern}} for key in CHORD_SEARCH_KEYS]}
+    queries.append({
+        "filter_dict": filter_dict,
+        "projection": CHORD_FIELDS,
+        "id_as_string": True,
+        "max_time_ms": SEARCH_MAX_TIME_MS,
+    })
+    return queries
+
+async def find_chords(queries: List[dict]) -> List[dict]:
+    """Results of the first of queries that matches anything
+
+    A query that fails (e.g. $text before its index exists) falls through to the next one.
+    """
+    for i, query in enumerate(queries):
+        try:
+            docs = await get_documents("chord", **query)
+        except ExecutionTimeout:
+            raise
+        except OperationFailure:
+            if i == len(queries) - 1:
+                raise
+            logger.warning("Chord query failed; falling back to the next one", exc_info=True)
+            continue
+        if docs:
+            break
+    return docs
+
+async def stream_first_match(streams):
+    """Return the first of streams that yields anything, reading ahead to its first document
+
+    Only the winning stream is left to iterate, so the response can start once a match is known.
+    A stream whose query fails (e.g. $text before its index exists) falls through to the next one.
+    """
+    for i, docs in enumerate(streams):
+        try:
+            first = await docs.__anext__()
+        except StopAsyncIteration:
+            continue
+        except ExecutionTimeout:
+            raise
+        except OperationFailure:
+            if i == len(streams) - 1:
+                raise
+            logger.warning("Streamed query failed; falling back to the next one", exc_info=True)
+            continue
+
+        async def documents(first=first, docs=docs):
+            yield first
+            async for doc in docs:
+                yield doc
+
+        return documents()
+
+    async def no_documents():
+        return
+        yield
+
+    return no_documents()
+
+def ndjson_response(docs) -> StreamingResponse:
+    """Stream documents as newline-delimited JSON, one line per document"""
+    async def lines():
+        async for doc in docs:
+            yield encode_json(doc) + b"\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 # Public endpoints
 @app.get("/chords")
-def list_chords(q: Optional[str] = None):
-    try:
-        filter_dict = {}
-        if q:
-            # Simple case-insensitive substring match on name or symbol
-            filter_dict = {"$or": [{"name": {"$regex": q, "$options": "i"}}, {"symbol": {"$regex": q, "$options": "i"}}]}
-        docs = get_documents("chord", filter_dict)
-        for d in docs:
-            d["_id"] = str(d["_id"])
-        return docs
+@cached_endpoint("chords")
+async def list_chords(q: Optional[str] = None, contains: bool = False):
+    queries = chord_queries(q, contains)
+    try:
+        return await find_chords(queries)
+    except ExecutionTimeout:
+        # Aborted on purpose by maxTimeMS
+        raise HTTPException(status_code=503, detail=SEARCH_TIMEOUT_DETAIL)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/progressions")
-def list_progressions():
+@cached_endpoint("progressions")
+async def list_progressions():
     try:
-        docs = get_documents("progression")
-        for d in docs:
-            d["_id"] = str(d["_id"])
-        return docs
+        return await get_documents("progression", projection=PROGRESSION_FIELDS, id_as_string=True)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/lessons")
-def list_lessons():
+@cached_endpoint("lessons")
+async def list_lessons():
+    try:
+        return await get_documents("lesson", projection=LESSON_FIELDS, id_as_string=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Streaming variants for large result sets: NDJSON, uncached, memory independent of result size
+@app.get("/chords/stream")
+async def stream_chords(q: Optional[str] = None, contains: bool = False):
+    queries = chord_queries(q, contains)
+    try:
+        streams = [stream_documents("chord", **query) for query in queries]
+        return ndjson_response(await stream_first_match(streams))
+    except ExecutionTimeout:
+        # Aborted on purpose by maxTimeMS
+        raise HTTPException(status_code=503, detail=SEARCH_TIMEOUT_DETAIL)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/progressions/stream")
+async def stream_progressions():
+    try:
+        return ndjson_response(stream_documents("progression", projection=PROGRESSION_FIELDS, id_as_string=True))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/lessons/stream")
+async def stream_lessons():
     try:
-        docs = get_documents("lesson")
-        for d in docs:
-            d["_id"] = str(d["_id"])
-        return docs
+        return ndjson_response(stream_documents("lesson", projection=LESSON_FIELDS, id_as_string=True))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -135,21 +466,128 @@ class FavoriteIn(BaseModel):
     ref: str
     note: Optional[str] = None
 
+# Favorites are written behind the request: add_favorite queues them and a background task
+# upserts them in batches of up to FAVORITE_BATCH_SIZE, waiting at most FAVORITE_FLUSH_SECONDS.
+# The queue is bounded so a slow database turns into 503s instead of unbounded memory.
+FAVORITE_BATCH_SIZE = 100
+FAVORITE_FLUSH_SECONDS = 0.05
+FAVORITE_QUEUE_SIZE = 10_000
+# A failed batch is requeued until each favorite has been tried FAVORITE_MAX_ATTEMPTS times,
+# with FAVORITE_RETRY_SECONDS between batches; for FAVORITE_OUTAGE_SECONDS after a failure
+# new favorites are refused with 503 rather than accepted into a queue that can't drain
+FAVORITE_MAX_ATTEMPTS = 3
+FAVORITE_RETRY_SECONDS = 5
+FAVORITE_OUTAGE_SECONDS = 30
+# How long shutdown waits for queued favorites to be written
+FAVORITE_SHUTDOWN_SECONDS = 10
+# Queued at shutdown; the writer flushes its partial batch and exits when it reads this
+_STOP_FAVORITE_WRITER = object()
+
+async def write_favorites(queue: asyncio.Queue, batch: List[tuple]) -> bool:
+    """Upsert a batch of (favorite, attempts) items, requeueing them if the write fails"""
+    # Later writes for the same favorite win, matching one upsert per request
+    latest = {tuple(favorite_filter(fav).values()): (fav, attempts) for fav, attempts in batch}
+    try:
+        await upsert_documents("favorite", [(favorite_filter(fav), fav) for fav, _ in latest.values()])
+    except Exception:
+        logger.exception("Failed to write %d favorites", len(latest))
+        app.state.favorites_failed_at = asyncio.get_running_loop().time()
+        dropped = 0
+        for fav, attempts in latest.values():
+            if attempts + 1 >= FAVORITE_MAX_ATTEMPTS:
+                dropped += 1
+                continue
+            try:
+                queue.put_nowait((fav, attempts + 1))
+            except asyncio.QueueFull:
+                dropped += 1
+        if dropped:
+            logger.error("Dropped %d favorites after repeated write failures", dropped)
+        return False
+    app.state.favorites_failed_at = None
+    return True
+
+async def flush_favorites_forever(queue: asyncio.Queue):
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        item = await queue.get()
+        if item is _STOP_FAVORITE_WRITER:
+            return
+        batch = [item]
+        deadline = loop.time() + FAVORITE_FLUSH_SECONDS
+        while len(batch) < FAVORITE_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if item is _STOP_FAVORITE_WRITER:
+                stopping = True
+                break
+            batch.append(item)
+        if not await write_favorites(queue, batch) and not stopping:
+            await asyncio.sleep(FAVORITE_RETRY_SECONDS)
+
+@app.on_event("startup")
+async def start_favorite_writer():
+    if db is None:
+        return
+    # Created here rather than at import so the queue belongs to the running event loop
+    app.state.favorite_queue = asyncio.Queue(maxsize=FAVORITE_QUEUE_SIZE)
+    app.state.favorites_failed_at = None
+    app.state.favorite_writer = asyncio.create_task(flush_favorites_forever(app.state.favorite_queue))
+
+@app.on_event("shutdown")
+async def stop_favorite_writer():
+    writer = getattr(app.state, "favorite_writer", None)
+    if writer is None:
+        return
+    queue = app.state.favorite_queue
+
+    async def drain():
+        # Let the writer finish its current batch and everything queued ahead of the stop marker
+        await queue.put(_STOP_FAVORITE_WRITER)
+        await writer
+
+    try:
+        await asyncio.wait_for(drain(), FAVORITE_SHUTDOWN_SECONDS)
+    except asyncio.TimeoutError:
+        logger.error("Timed out writing favorites at shutdown; abandoning the batch in flight")
+        writer.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await writer
+    del app.state.favorite_writer
+    unwritten = 0
+    while not queue.empty():
+        if queue.get_nowait() is not _STOP_FAVORITE_WRITER:
+            unwritten += 1
+    if unwritten:
+        logger.error("Dropped %d queued favorites at shutdown", unwritten)
+
 @app.post("/favorites")
-def add_favorite(fav: FavoriteIn):
+async def add_favorite(fav: FavoriteIn):
+    if db is None:
+        raise HTTPException(status_code=500, detail="Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    writer = getattr(app.state, "favorite_writer", None)
+    if writer is None or writer.done():
+        raise HTTPException(status_code=503, detail="Favorites are temporarily unavailable")
+    failed_at = app.state.favorites_failed_at
+    if failed_at is not None and asyncio.get_running_loop().time() - failed_at < FAVORITE_OUTAGE_SECONDS:
+        raise HTTPException(status_code=503, detail="Favorites are temporarily unavailable; try again shortly")
     try:
-        create_document("favorite", Favorite(**fav.model_dump()))
-        return {"status": "saved"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        app.state.favorite_queue.put_nowait((fav.model_dump(), 0))
+    except asyncio.QueueFull:
+        raise HTTPException(status_code=503, detail="Too many pending favorites; try again shortly")
+    return {"status": "queued"}
 
 @app.get("/favorites/{client_id}")
-def get_favorites(client_id: str):
+async def get_favorites(client_id: str):
     try:
-        docs = get_documents("favorite", {"client_id": client_id})
-        for d in docs:
-            d["_id"] = str(d["_id"])
-        return docs
+        # Returned as a response object so FastAPI skips jsonable_encoder
+        return MongoJSONResponse(await get_documents("favorite", {"client_id": client_id}, projection=FAVORITE_FIELDS))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 